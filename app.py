@@ -1,15 +1,23 @@
 import re
+import string
+from bisect import bisect_left, bisect_right
 from collections import Counter
+from functools import lru_cache
+from threading import local
+import ahocorasick
 import streamlit as st
+try:
+    import hyperscan
+except ImportError:  # hyperscan is optional (Linux/x86 wheels); grammar checks fall back to re
+    hyperscan = None
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from sentence_transformers import SentenceTransformer
 
 # Cached model loader
 @st.cache_resource
 def load_models():
-    return SentimentIntensityAnalyzer(), SentenceTransformer('all-MiniLM-L6-v2')
+    return SentimentIntensityAnalyzer()
 
-sentiment_analyzer, semantic_model = load_models()
+sentiment_analyzer = load_models()
 
 # Compact rubric & weights
 WEIGHTS = {
@@ -38,160 +46,256 @@ GOOD_KEYWORDS = {
     "unique": ["fun fact", "special", "unique", "interesting"],
     "achievements": ["achievement", "award", "won", "proud"]
 }
-FILLERS = ["um", "uh", "like", "you know", "so", "actually", "basically", "right", "i mean", "well", "kinda", "sort of", "okay", "hmm", "ah"]
+FILLERS = frozenset(["um", "uh", "like", "you know", "so", "actually", "basically", "right", "i mean", "well", "kinda", "sort of", "okay", "hmm", "ah"])
+
+# Precompiled patterns (hoisted so helpers skip the re module cache lookup);
+# keyword patterns expect the pre-lowered transcript
+_TOKEN_RE = re.compile(r'\b\w+\b')
+_GRAMMAR1_RE = re.compile(r'\s+i\s+(?=[a-z])')
+_GRAMMAR2_RE = re.compile(r'[.!?]\s+[a-z]')
+_SENT_SPLIT_RE = re.compile(r'[.!?]+')
+_SENT_KEEP_RE = re.compile(r'(?<=[.!?])\s+')  # splits after the terminator, keeping it for VADER's !/? emphasis
+
+def _build_grammar_db():
+    # both grammar checks in one Hyperscan database; Hyperscan has no lookahead,
+    # so the first pattern consumes its trailing letter and overlaps are dropped when counting
+    if hyperscan is None:
+        return None
+    db = hyperscan.Database()
+    db.compile(expressions=[rb'\s+i\s+[a-z]', rb'[.!?]\s+[a-z]'], ids=[0, 1], elements=2, flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * 2)
+    return db
+
+_GRAMMAR_DB = _build_grammar_db()
+_GRAMMAR_SCRATCH = local()  # Hyperscan scratch space must not be shared between Streamlit session threads
+
+def _build_keyword_automaton():
+    # every must/good keyword and filler in one automaton; a phrase can carry several tags ("like")
+    tags = {}
+    for group, cats in (("must", MUST_KEYWORDS), ("good", GOOD_KEYWORDS)):
+        for cat, kws in cats.items():
+            for kw in kws:
+                tags.setdefault(kw, []).append((group, cat))
+    for f in FILLERS:
+        tags.setdefault(f, []).append(("filler", f))
+    A = ahocorasick.Automaton()
+    for kw, t in tags.items():
+        A.add_word(kw, (len(kw), tuple(t)))
+    A.make_automaton()
+    return A
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+_SAL_EXCELLENT = re.compile(r'i am excited|feeling great|pleased to introduce')
+_SAL_GOOD = re.compile(r'good morning|good afternoon|good evening|good day|hello everyone|greetings')
+_SAL_NORMAL = re.compile(r'hi|hello|hey')
+
+
+# Threshold ladders as sorted bounds -> parallel score/label tables (one bisect per lookup);
+# bisect_right keeps the ">= bound" semantics of the original if/elif chains
+_TTR_BOUNDS = (0.45, 0.55, 0.65, 0.75)
+_TTR_SCORES = (7, 9, 11, 13, 15)
+_TTR_LABELS = ("Basic", "Fair", "Good", "Very Good", "Excellent")
+_GRAMMAR_BOUNDS = (1, 2, 3, 5)
+_GRAMMAR_SCORES = (15, 13, 11, 9, 7)
+_GRAMMAR_LABELS = ("Very few grammar issues", "Minor grammar issues", "Some grammar issues", "Multiple grammar issues", "Needs grammar improvement")
+_FILLER_BOUNDS = (1, 2, 3, 5)
+_FILLER_SCORES = (10, 9, 8, 6, 4)
+_FILLER_LABELS = ("Excellent", "Very Good", "Good", "Fair", "Needs improvement")
+# speech rate peaks in a 100-150 WPM band; each side has its own bounds
+_RATE_LOW_BOUNDS = (60, 80, 100)
+_RATE_HIGH_BOUNDS = (170, 190)
+_RATE_SCORES = (4, 6, 8, 10)
+_RATE_LABELS = ("Speech rate: {:.1f} WPM (consider adjusting pace)", "Acceptable speech rate: {:.1f} WPM", "Good speech rate: {:.1f} WPM", "Excellent speech rate: {:.1f} WPM")
+# sentiment tier is the better of the compound tier and the pos tier
+_SENT_BOUNDS = (-0.3, -0.1, 0.1, 0.3)
+_SENT_POS_BOUNDS = (0.1, 0.2)
+_SENT_POS_TIERS = (0, 3, 4)
+_SENT_SCORES = (4, 6, 8, 9, 10)
+_SENT_LABELS = ("Could be more positive", "Neutral", "Neutral-positive", "Friendly", "Positive & engaging")
 
 
 # Helpers (compact)
 def _clean(text):
-    return re.sub(r'\s+', ' ', text.strip())
-
-def contains_any(text, keywords):
-    t = text.lower()
-    return any(k in t for k in keywords)
-
-def count_category_matches(text, categories):
-    t = text.lower()
-    found = []
-    for cat, keys in categories.items():
-        if any(k in t for k in keys):
-            found.append(cat)
-    return found
-
-def ttr_score(text):
-    words = re.findall(r'\b[a-z]+\b', text.lower())
-    if not words:
+    return ' '.join(text.split())
+
+def contains_any(text_lower, keywords):
+    return any(k in text_lower for k in keywords)
+
+def _is_boundary(text, i):
+    return i < 0 or i >= len(text) or not (text[i].isalnum() or text[i] == '_')
+
+def keyword_hits(text_lower):
+    # one automaton walk serves the keyword and filler scorers;
+    # categories match anywhere, fillers only as whole, non-overlapping words
+    hits = {"must": set(), "good": set(), "filler": 0}
+    filler_end = -1
+    for end, (n, tags) in _KEYWORD_AUTOMATON.iter(text_lower):
+        start = end - n + 1
+        for group, tag in tags:
+            if group != "filler":
+                hits[group].add(tag)
+            elif start > filler_end and _is_boundary(text_lower, start - 1) and _is_boundary(text_lower, end + 1):
+                hits["filler"] += 1
+                filler_end = end
+    return hits
+
+def ttr_score(total, unique):
+    if not total:
         return 0, "No words"
-    unique = len(set(words)); total = len(words)
     ttr = unique / total
-    if ttr >= 0.75: return 15, f"Excellent - TTR {ttr:.2f} ({unique}/{total})"
-    if ttr >= 0.65: return 13, f"Very Good - TTR {ttr:.2f} ({unique}/{total})"
-    if ttr >= 0.55: return 11, f"Good - TTR {ttr:.2f} ({unique}/{total})"
-    if ttr >= 0.45: return 9, f"Fair - TTR {ttr:.2f} ({unique}/{total})"
-    return 7, f"Basic - TTR {ttr:.2f} ({unique}/{total})"
-
-def grammar_score(text):
+    i = bisect_right(_TTR_BOUNDS, ttr)
+    return _TTR_SCORES[i], f"{_TTR_LABELS[i]} - TTR {ttr:.2f} ({unique}/{total})"
+
+def _grammar_match_counts(text):
+    # one scan for both patterns; counts equal re.findall on the cleaned (space-only) text
+    if _GRAMMAR_DB is None:
+        return len(_GRAMMAR1_RE.findall(text)), len(_GRAMMAR2_RE.findall(text))
+    scratch = getattr(_GRAMMAR_SCRATCH, 'scratch', None)
+    if scratch is None:
+        scratch = _GRAMMAR_SCRATCH.scratch = hyperscan.Scratch(_GRAMMAR_DB)
+    counts, resume = [0, 0], [0, 0]
+    def on_match(pid, start, end, flags, ctx):
+        if start >= resume[pid]:
+            counts[pid] += 1
+            resume[pid] = end - 1 if pid == 0 else end  # pattern 0's last letter stands in for the lookahead
+    _GRAMMAR_DB.scan(text.encode(), match_event_handler=on_match, scratch=scratch)
+    return counts[0], counts[1]
+
+def grammar_score(text, n_words, sentences):
     # simple major-issue checks -> small penalty per match
-    patterns = [ (r'\s+i\s+(?=[a-z])', 0.5), (r'[.!?]\s+[a-z]', 0.5) ]
     errors = 0
-    for pat, w in patterns:
-        errors += len(re.findall(pat, text)) * w
+    for n, w in zip(_grammar_match_counts(text), (0.5, 0.5)):
+        errors += n * w
     # count very short fragments
-    fragments = re.split(r'[.!?]+', text)
-    for f in fragments:
-        if len(f.strip().split()) == 1:
+    for f in sentences:
+        if len(f.split()) == 1:
             errors += 0.5
-    total_words = max(1, len(text.split()))
+    total_words = max(1, n_words)
     errors_per_100 = (errors / total_words) * 100
     # map to 15
-    if errors_per_100 < 1: return 15, "Very few grammar issues"
-    if errors_per_100 < 2: return 13, "Minor grammar issues"
-    if errors_per_100 < 3: return 11, "Some grammar issues"
-    if errors_per_100 < 5: return 9, "Multiple grammar issues"
-    return 7, "Needs grammar improvement"
-
-def filler_score(text):
-    words = re.findall(r'\b\w+\b', text.lower())
+    i = bisect_right(_GRAMMAR_BOUNDS, errors_per_100)
+    return _GRAMMAR_SCORES[i], _GRAMMAR_LABELS[i]
+
+def filler_score(words, count):
     total = len(words)
     if total == 0:
         return 8, "No words"
-    t = ' ' + text.lower() + ' '
-    count = sum(t.count(' ' + f + ' ') for f in FILLERS)
     rate = (count / total) * 100
-    if rate < 1: return 10, f"Excellent - filler {rate:.1f}% ({count})"
-    if rate < 2: return 9, f"Very Good - filler {rate:.1f}% ({count})"
-    if rate < 3: return 8, f"Good - filler {rate:.1f}% ({count})"
-    if rate < 5: return 6, f"Fair - filler {rate:.1f}% ({count})"
-    return 4, f"Needs improvement - filler {rate:.1f}% ({count})"
-
-def salutation_score(text):
-    first = '. '.join(text.split('.')[:2]).lower()
-    excellent = ["i am excited", "feeling great", "pleased to introduce"]
-    good = ["good morning", "good afternoon", "good evening", "good day", "hello everyone", "greetings"]
-    normal = ["hi", "hello", "hey"]
-    if any(p in first for p in excellent): return 5, "Excellent salutation - enthusiastic"
-    if any(p in first for p in good): return 5, "Proper greeting"
-    if any(p in first for p in normal): return 4, "Basic greeting"
+    i = bisect_right(_FILLER_BOUNDS, rate)
+    return _FILLER_SCORES[i], f"{_FILLER_LABELS[i]} - filler {rate:.1f}% ({count})"
+
+def salutation_score(text_lower):
+    if _SAL_EXCELLENT.search(text_lower): return 5, "Excellent salutation - enthusiastic"
+    if _SAL_GOOD.search(text_lower): return 5, "Proper greeting"
+    if _SAL_NORMAL.search(text_lower): return 4, "Basic greeting"
     return 2, "Started directly"
 
-def sentiment_score(text):
-    s = sentiment_analyzer.polarity_scores(text)
-    c, pos = s['compound'], s['pos']
-    if c >= 0.3 or pos >= 0.2: return 10, f"Positive & engaging (compound {c:.2f})"
-    if c >= 0.1 or pos >= 0.1: return 9, f"Friendly (compound {c:.2f})"
-    if c >= -0.1: return 8, f"Neutral-positive (compound {c:.2f})"
-    if c >= -0.3: return 6, f"Neutral (compound {c:.2f})"
-    return 4, f"Could be more positive (compound {c:.2f})"
+def _vader_token(token):
+    # mirrors VADER's SentiText tokenization: strip edge punctuation unless it leaves an emoticon
+    stripped = token.strip(string.punctuation)
+    return token if len(stripped) <= 2 else stripped
+
+@lru_cache(maxsize=4096)
+def _sent_vader(sentence):
+    # VADER only assigns valence to lexicon words and emojis; without either it scores (0, 0)
+    if set(sentence).isdisjoint(sentiment_analyzer.emojis) and not any(_vader_token(t).lower() in sentiment_analyzer.lexicon for t in sentence.split()):
+        return 0.0, 0.0
+    s = sentiment_analyzer.polarity_scores(sentence)
+    return s['compound'], s['pos']
+
+def sentiment_score(text, sentences):
+    # score per sentence (cached across edits) and mean-aggregate
+    scores = [_sent_vader(s) for s in sentences] or [_sent_vader(text)]
+    c = sum(sc[0] for sc in scores) / len(scores)
+    pos = sum(sc[1] for sc in scores) / len(scores)
+    i = max(bisect_right(_SENT_BOUNDS, c), _SENT_POS_TIERS[bisect_right(_SENT_POS_BOUNDS, pos)])
+    return _SENT_SCORES[i], f"{_SENT_LABELS[i]} (compound {c:.2f})"
+
+def keyword_score(hits):
+    # keep rubric order for stable feedback
+    found_must = [cat for cat in MUST_KEYWORDS if cat in hits["must"]]
+    must_pts = min(len(found_must) * (WEIGHTS["keywords"] / len(MUST_KEYWORDS)), WEIGHTS["keywords"])
+    found_good = [cat for cat in GOOD_KEYWORDS if cat in hits["good"]]
+    bonus = min(len(found_good), 5)
+    kw_fb = f"Found must-have: {', '.join(found_must) or 'none'}; good extras: {', '.join(found_good) or 'none'}"
+    return min(must_pts + bonus, WEIGHTS["keywords"]), kw_fb
+
+def flow_score(sentences_lower):
+    name_early = any(('name' in s or 'myself' in s or 'i am' in s) for s in sentences_lower[:2])
+    has_closing = contains_any(sentences_lower[-1], ['thank', 'thanks', 'listening', 'attention']) if sentences_lower else False
+    has_middle = len(sentences_lower) >= 4
+    flow_pts = (2 if name_early else 0) + (2 if has_middle else 0) + (1 if has_closing else 0)
+    parts = []
+    if name_early: parts.append("good opening")
+    if has_middle: parts.append("middle content")
+    if has_closing: parts.append("closing")
+    return flow_pts, ", ".join(parts) or "Basic flow"
 
-def speech_rate_score(text, duration_sec):
+def speech_rate_score(n_words, duration_sec):
     if duration_sec <= 0:
         return 8, "Duration not provided"
-    words = len(text.split())
-    wpm = (words / duration_sec) * 60
-    if 100 <= wpm <= 150: return 10, f"Excellent speech rate: {wpm:.1f} WPM"
-    if 80 <= wpm < 100 or 150 < wpm <= 170: return 8, f"Good speech rate: {wpm:.1f} WPM"
-    if 60 <= wpm < 80 or 170 < wpm <= 190: return 6, f"Acceptable speech rate: {wpm:.1f} WPM"
-    return 4, f"Speech rate: {wpm:.1f} WPM (consider adjusting pace)"
+    wpm = (n_words / duration_sec) * 60
+    # 150 itself is excellent, 170/190 belong to the tier below them
+    i = bisect_right(_RATE_LOW_BOUNDS, wpm) if wpm <= 150 else 2 - bisect_left(_RATE_HIGH_BOUNDS, wpm)
+    return _RATE_SCORES[i], _RATE_LABELS[i].format(wpm)
 
 
 # Main analyzer (compact orchestration)
+CRITERIA = (
+    ("salutation", "Salutation"),
+    ("keywords", "Content & Keywords"),
+    ("flow", "Flow & Structure"),
+    ("rate", "Speech Rate"),
+    ("grammar", "Grammar & Language"),
+    ("vocab", "Vocabulary Richness"),
+    ("filler", "Clarity (Filler Words)"),
+    ("sentiment", "Engagement & Positivity"),
+)
+
+# memoized per (transcript, duration); cache_data hands back a fresh copy on every hit
+@st.cache_data(show_spinner=False, max_entries=128)
 def analyze_transcript(transcript, duration_sec=52):
     text = _clean(transcript)
+    # tokenize once and share across the scorers
+    text_lower = text.lower()
+    words = _TOKEN_RE.findall(text_lower)
+    n_words = len(text.split())
+    # case-insensitive consumers get the lowered split; VADER keeps original case and punctuation for emphasis
+    sentences_lower = [s.strip() for s in _SENT_SPLIT_RE.split(text_lower) if s.strip()]
+    sentences = [s for s in _SENT_KEEP_RE.split(text) if s]
+    # TTR counts alphabetic tokens only (no numbers or "8th")
+    wc = Counter(w for w in words if w.isascii() and w.isalpha())
+    total, unique = sum(wc.values()), len(wc)
+    hits = keyword_hits(text_lower)
+    # every criterion is an independent (scorer, args) job
+    jobs = {
+        "salutation": (salutation_score, ' '.join(sentences_lower[:2])),
+        "keywords": (keyword_score, hits),
+        "flow": (flow_score, sentences_lower),
+        "rate": (speech_rate_score, n_words, duration_sec),
+        "grammar": (grammar_score, text, n_words, sentences_lower),
+        "vocab": (ttr_score, total, unique),
+        "filler": (filler_score, words, hits["filler"]),
+        "sentiment": (sentiment_score, text, sentences),
+    }
+    return _build_results(sentences_lower, n_words, _run_jobs(jobs))
+
+def _run_jobs(jobs):
+    # sequential: every scorer is pure Python holding the GIL (re included), so a thread pool only adds hand-off cost
+    return {k: fn(*args) for k, (fn, *args) in jobs.items()}
+
+def _build_results(sentences, n_words, scored):
     results = {
         "overall_score": 0,
-        "word_count": len(text.split()),
-        "sentence_count": len([s for s in text.split('.') if s.strip()]),
+        "word_count": n_words,
+        "sentence_count": len(sentences),
         "criteria_scores": []
     }
-
-    # salutation
-    s_score, s_fb = salutation_score(text)
-    results["criteria_scores"].append({"criterion": "Salutation", "score": s_score, "max_score": WEIGHTS["salutation"], "weight": WEIGHTS["salutation"], "feedback": s_fb})
-    results["overall_score"] += (s_score / 5) * WEIGHTS["salutation"]
-
-    # keywords 
-    found_must = count_category_matches(text, MUST_KEYWORDS)
-    must_pts = min(len(found_must) * (WEIGHTS["keywords"] / len(MUST_KEYWORDS)), WEIGHTS["keywords"])
-    found_good = count_category_matches(text, GOOD_KEYWORDS)
-    bonus = min(len(found_good), 5)
-    kw_fb = f"Found must-have: {', '.join(found_must) or 'none'}; good extras: {', '.join(found_good) or 'none'}"
-    kw_score_total = min(must_pts + bonus, WEIGHTS["keywords"])
-    results["criteria_scores"].append({"criterion": "Content & Keywords", "score": kw_score_total, "max_score": WEIGHTS["keywords"], "weight": WEIGHTS["keywords"], "feedback": kw_fb})
-    results["overall_score"] += kw_score_total
-
-    # flow
-    sentences = [s.strip() for s in text.split('.') if s.strip()]
-    name_early = any(('name' in s.lower() or 'myself' in s.lower() or 'i am' in s.lower()) for s in sentences[:2])
-    has_closing = any(w in sentences[-1].lower() for w in ['thank', 'thanks', 'listening', 'attention']) if sentences else False
-    has_middle = len(sentences) >= 4
-    flow_pts = (2 if name_early else 0) + (2 if has_middle else 0) + (1 if has_closing else 0)
-    results["criteria_scores"].append({"criterion": "Flow & Structure", "score": flow_pts, "max_score": WEIGHTS["flow"], "weight": WEIGHTS["flow"], "feedback": f"{'good opening, ' if name_early else ''}{'middle content, ' if has_middle else ''}{'closing' if has_closing else ''}".strip(' ,') or "Basic flow"})
-    results["overall_score"] += flow_pts
-
-    # speech rate
-    rate_pts, rate_fb = speech_rate_score(text, duration_sec)
-    # rate_pts is out of 10; weight is 10
-    results["criteria_scores"].append({"criterion": "Speech Rate", "score": rate_pts, "max_score": WEIGHTS["rate"], "weight": WEIGHTS["rate"], "feedback": rate_fb})
-    results["overall_score"] += rate_pts
-
-    # grammar
-    gram_pts, gram_fb = grammar_score(text)
-    results["criteria_scores"].append({"criterion": "Grammar & Language", "score": gram_pts, "max_score": WEIGHTS["grammar"], "weight": WEIGHTS["grammar"], "feedback": gram_fb})
-    results["overall_score"] += gram_pts
-
-    # vocab (TTR mapped to 15)
-    vocab_pts, vocab_fb = ttr_score(text)
-    results["criteria_scores"].append({"criterion": "Vocabulary Richness", "score": vocab_pts, "max_score": WEIGHTS["vocab"], "weight": WEIGHTS["vocab"], "feedback": vocab_fb})
-    results["overall_score"] += vocab_pts
-
-    # filler
-    fill_pts, fill_fb = filler_score(text)
-    results["criteria_scores"].append({"criterion": "Clarity (Filler Words)", "score": fill_pts, "max_score": WEIGHTS["filler"], "weight": WEIGHTS["filler"], "feedback": fill_fb})
-    results["overall_score"] += fill_pts
-
-    # sentiment
-    sent_pts, sent_fb = sentiment_score(text)
-    results["criteria_scores"].append({"criterion": "Engagement & Positivity", "score": sent_pts, "max_score": WEIGHTS["sentiment"], "weight": WEIGHTS["sentiment"], "feedback": sent_fb})
-    results["overall_score"] += sent_pts
+    # each criterion is scored out of its weight, so points add straight to the total
+    for key, label in CRITERIA:
+        pts, fb = scored[key]
+        results["criteria_scores"].append({"criterion": label, "score": pts, "max_score": WEIGHTS[key], "weight": WEIGHTS[key], "feedback": fb})
+        results["overall_score"] += pts
 
     # Normalize overall to 0-100 (WEIGHTS total is 100 when each criterion sum equals its weight)
     results["overall_score"] = float(min(max(results["overall_score"], 0), 100))